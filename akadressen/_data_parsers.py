@@ -5,12 +5,11 @@ import datetime
 
 # Mostly copied from https://github.com/Bibo-Joshi/AkaNamen-Bot/blob/master/components/member.py
 import re
-from typing import NamedTuple, Optional, Union, overload
+from functools import lru_cache
+from typing import Optional
 
 import dateutil.parser
 
-_NAN = float  # = type(np.nan)
-
 
 class _DEPerserInfo(dateutil.parser.parserinfo):
     MONTHS = [
@@ -29,109 +28,59 @@ class _DEPerserInfo(dateutil.parser.parserinfo):
     ]
 
 
-def string_to_date(string: Union[str, _NAN, None]) -> Optional[datetime.date]:
-    if isinstance(string, _NAN) or string is None:
+_DE_PARSER_INFO = _DEPerserInfo(dayfirst=True)
+# The formats commonly used in the AkaDressen. Trying them first is much faster than dateutil.
+# ISO dates must be caught here, as the day-first fallback would swap their day and month
+_DATE_FORMATS = ("%d.%m.%Y", "%d.%m.%y", "%d/%m/%y", "%Y-%m-%d")
+# A run takes only a few seconds, so there is no need to look this up for every entry
+_CURRENT_YEAR = datetime.date.today().year
+
+
+# Dates repeat a lot, especially the years in which members joined
+@lru_cache(maxsize=4096)
+def string_to_date(string: Optional[str]) -> Optional[datetime.date]:
+    if string is None:
         return None
 
-    out = dateutil.parser.parse(string, parserinfo=_DEPerserInfo()).date()
-    if out.year > datetime.datetime.now().year:
+    for date_format in _DATE_FORMATS:
+        try:
+            out = datetime.datetime.strptime(string, date_format).date()
+            break
+        except ValueError:
+            pass
+    else:
+        out = dateutil.parser.parse(string, parserinfo=_DE_PARSER_INFO).date()
+
+    if out.year > _CURRENT_YEAR:
         out = out.replace(year=out.year - 100)
     return out
 
 
 def year_from_date(date: Optional[datetime.date]) -> Optional[int]:
-    if isinstance(date, _NAN) or date is None:
+    if date is None:
         return None
     return date.year
 
 
-@overload
-def remove_whitespaces(string: str) -> str:
-    ...
-
-
-@overload
-def remove_whitespaces(string: Union[_NAN, None]) -> None:
-    ...
-
-
-def remove_whitespaces(string: Union[str, _NAN, None]) -> Optional[str]:
-    if isinstance(string, _NAN) or string is None:
-        return None
-
-    return string.strip()
-
-
-def expand_brunswick(address: Union[str, _NAN, None]) -> Optional[str]:
-    if isinstance(address, _NAN) or address is None:
-        return None
-
-    address = remove_whitespaces(address)
-    return address.replace("BS", "Braunschweig")
+# Local phone numbers from brunswick are missing the area code, i.e. start with a non-zero digit
+LOCAL_PHONE_NUMBER_STARTS = frozenset("123456789")
 
+YEAR_PATTERN = re.compile(r"\d{4}")
 
-def phone_number(string: Union[str, _NAN, None]) -> Optional[str]:
-    if isinstance(string, _NAN) or string is None:
-        return None
-    # Make an educated guess on when we're in brunswick …
-    if (first_char := string[0]).isdigit() and first_char != "0":
-        return f"0531/{string}"
-    return string
-
-
-def split_city_state(string: Union[str, _NAN, None]) -> tuple[Optional[str], Optional[str]]:
-    if isinstance(string, _NAN) or string is None:
-        return None, None
-
-    if "," not in string:
-        return (string, None)
-
-    city, state = string.split(",", maxsplit=1)
-    return city.strip(), state.strip()
-
-
-class _FullStreet(NamedTuple):
-    street: Optional[str] = None
-    house_number: Optional[str] = None
-    additional: Optional[str] = None
-
-
-_FULL_STREET_PATTERN = re.compile(
-    # Match the street: Neither `,` nor digits. Negative lookbehind for trailing whitespace
-    r"^(((?P<street>[^,\d]+(?<! ))"
+# The street patterns avoid alternations and lookbehinds such that the engine can't backtrack
+# excessively on entries that don't match
+STREET_HOUSE_NUMBER_PATTERN = re.compile(
+    # Match the street: Words of neither `,` nor digits, separated by whitespaces
+    r"^(?P<street>[^,\d ]+(?: +[^,\d ]+)*)"
     # Followed by one or more whitespaces
     r" +"
     # House number: starts with a digit, rest doesn't matter - just not a `,`
-    r"(?P<house_number>\d[^,]*))"
-    # Alternatively street and house number may be swapped
-    r"|((?P<house_number1>\d[^, ]*(?<! )) +(?P<street1>[^,\d]+)))"
+    r"(?P<house_number>\d[^,]*)"
     # Optional: additional info before the next comma, e.g. room number
-    r"(, *(?P<additional>[^,]+))?"
+    r"(?:, *(?P<additional>[^,]+))?"
 )
 
-
-def parse_full_street(string: Optional[str]) -> _FullStreet:
-    if not string:
-        return _FullStreet()
-
-    if match := _FULL_STREET_PATTERN.match(string):
-        full_street = match.groupdict()
-
-        street1 = full_street.pop("street1")
-        full_street["street"] = full_street["street"] or street1
-
-        house_number1 = full_street.pop("house_number1")
-        full_street["house_number"] = full_street["house_number"] or house_number1
-
-        return _FullStreet(**full_street)
-
-    # # If the pattern doesn't match, we make a best effort guess ...
-    # parts = [part.strip() for part in string.split(",", maxsplit=2)]
-    # if len(parts) >= 2:
-    #     street = parts[0]
-    #     city = parts[1]
-    #     state = parts[2] if len(parts) >= 3 else None
-    #     return _FullStreet(street=street)
-
-    # or just fall back to putting everything as the street ...
-    return _FullStreet(street=string)
+# Alternatively street and house number may be swapped
+HOUSE_NUMBER_STREET_PATTERN = re.compile(
+    r"^(?P<house_number>\d[^, ]*) +(?P<street>[^,\d]+)(?:, *(?P<additional>[^,]+))?"
+)
@@ -2,10 +2,12 @@
 """This module contains the class NCAddressBook which represents a NextCloud CardDav address
 book."""
 import asyncio
+from contextlib import asynccontextmanager
+from io import BytesIO, TextIOWrapper
 from logging import getLogger
 from pathlib import Path
 from types import TracebackType
-from typing import Optional, Union
+from typing import AsyncIterator, Optional, Union
 from urllib.parse import urljoin
 from xml.etree import ElementTree as ET
 
@@ -15,6 +17,31 @@ from vobject.base import Component
 
 from akadressen._util import ProgressLogger, check_response_status, vcard_name_to_filename
 
+_DEFAULT_MAX_CONNECTIONS = 32
+_VCARD_CONTENT_TYPES = frozenset(
+    {
+        "text/vcard",
+        "text/vcard; charset=utf-8",
+        "text/x-vcard",
+        "text/x-vcard; charset=utf-8",
+    }
+)
+
+
+def _read_vcard(path: Path) -> Component:
+    with path.open(encoding="utf-8") as file:
+        return vobject.readOne(file, transform=True, validate=True)
+
+
+@asynccontextmanager
+async def _maybe_bounded(semaphore: Optional[asyncio.Semaphore]) -> AsyncIterator[None]:
+    # `contextlib.nullcontext` supports `async with` only from Python 3.10 on
+    if semaphore is None:
+        yield
+        return
+    async with semaphore:
+        yield
+
 
 class NCAddressBook:
     """Class for interacting with a NextCloud contact book. Should be used as async context
@@ -26,7 +53,9 @@ class NCAddressBook:
         username (:obj:`str`): Username.
         password (:obj:`str`): Password.
         timeout (:class:`httpx.Timeout`, optional): Timeout settings for the httpx client.
-        limits (:class:`httpx.Timeout`, optional): Limits settings for the httpx client.
+        limits (:class:`httpx.Limits`, optional): Limits settings for the httpx client. The number
+            of concurrent up- and downloads is bounded by ``max_connections``, where :obj:`None`
+            means unbounded. Defaults to at most 32 connections.
     """
 
     def __init__(  # pylint: disable=too-many-arguments
@@ -40,12 +69,17 @@ class NCAddressBook:
         self._base_url = base_url
         self._uids: dict[str, str] = {}
         self._v_cards: dict[str, Component] = {}
+        self._limits = limits or Limits(
+            max_connections=_DEFAULT_MAX_CONNECTIONS,
+            max_keepalive_connections=_DEFAULT_MAX_CONNECTIONS,
+        )
         self._client = AsyncClient(
             auth=(username, password) if username and password else None,
             verify=True,
             headers={"User-Agent": "AkaDressen-Script"},
             timeout=timeout,
-            limits=limits or Limits(),
+            limits=self._limits,
+            event_hooks={"response": [check_response_status]},
         )
         self._logger = getLogger(__name__)
 
@@ -94,43 +128,28 @@ class NCAddressBook:
             self._base_url,
             headers={"Depth": "1"},
         )
-        check_response_status(response)
         self._logger.debug("UIDs received. Parsing.")
 
         if clear or self._uids is None:
             self._uids = {}
 
-        xml_data = response.content.decode()
-        xml_data = xml_data.replace('<?xml version="1.0" encoding="utf-8"?>', "", 1)
         namespace = "{DAV:}"
-        element = ET.XML(xml_data)
-
-        for entry in element.iter():  # pylint: disable=too-many-nested-blocks
-            if entry.tag in [namespace + "entry", namespace + "response"]:
-                uid = ""
-                etag = ""
-                insert = False
-                for refprop in entry.iter():
-                    if refprop.tag == namespace + "href":
-                        if not refprop.text:
-                            raise RuntimeError("Something went wrong parsing the contacts.")
-                        uid = refprop.text.rsplit("/", 1)[-1].removesuffix(".vcf")
-                    for prop in refprop.iter():
-                        for props in prop.iter():
-                            if props.tag == namespace + "getcontenttype" and (
-                                props.text
-                                in [
-                                    "text/vcard",
-                                    "text/vcard; charset=utf-8",
-                                    "text/x-vcard",
-                                    "text/x-vcard; charset=utf-8",
-                                ]
-                            ):
-                                insert = True
-                            if props.tag == namespace + "getetag":
-                                etag = props.text or ""
-                        if insert and uid:
-                            self._uids[uid] = etag
+        # Parsing the raw bytes lets expat handle the XML declaration & decoding by itself
+        element = ET.fromstring(response.content)
+
+        for entry in element:
+            if entry.tag not in (f"{namespace}entry", f"{namespace}response"):
+                continue
+
+            if (href := entry.find(f"{namespace}href")) is None:
+                continue
+            if not href.text:
+                raise RuntimeError("Something went wrong parsing the contacts.")
+
+            if entry.findtext(f".//{namespace}getcontenttype") not in _VCARD_CONTENT_TYPES:
+                continue
+            if uid := href.text.rsplit("/", 1)[-1].removesuffix(".vcf"):
+                self._uids[uid] = entry.findtext(f".//{namespace}getetag") or ""
 
         return self.uids
 
@@ -141,7 +160,6 @@ class NCAddressBook:
             uid (:obj:`str`): The UID of the contact.
         """
         response = await self._client.get(urljoin(self._base_url, f"{uid}.vcf"))
-        check_response_status(response)
 
         etag = response.headers.get("oc-etag")
         self._uids[uid] = etag
@@ -162,8 +180,10 @@ class NCAddressBook:
         """
         self._logger.debug("Requesting vCard from address book.")
         content = await self.get_vcard_bytes(uid)
-        string_content = content.decode("utf-8")
-        vcard = vobject.readOne(string_content, transform=True, validate=True)
+        # vobject wraps strings in a StringIO anyway, so we may just as well hand over a stream
+        vcard = vobject.readOne(
+            TextIOWrapper(BytesIO(content), encoding="utf-8"), transform=True, validate=True
+        )
 
         effective_path = Path(path) if path else None
         if effective_path is None or effective_path.is_dir():
@@ -173,14 +193,25 @@ class NCAddressBook:
             effective_path = file_path if path is None else path / file_path
 
         self._logger.debug("Writing vCard to file.")
-        effective_path.write_bytes(content)
+        await asyncio.to_thread(effective_path.write_bytes, content)
         self._v_cards[uid] = vcard
         return vcard
 
+    def _build_semaphore(self) -> Optional[asyncio.Semaphore]:
+        # httpx treats `max_connections=None` as unlimited, so we don't bound anything either
+        if self._limits.max_connections is None:
+            return None
+        return asyncio.Semaphore(self._limits.max_connections)
+
     async def _download_vcard_with_logging(
-        self, uid: str, progress_logger: ProgressLogger, path: Union[str, Path] = None
+        self,
+        uid: str,
+        progress_logger: ProgressLogger,
+        semaphore: Optional[asyncio.Semaphore],
+        path: Union[str, Path] = None,
     ) -> Component:
-        out = await self.download_vcard(uid=uid, path=path)
+        async with _maybe_bounded(semaphore):
+            out = await self.download_vcard(uid=uid, path=path)
         progress_logger.log()
         return out
 
@@ -198,10 +229,11 @@ class NCAddressBook:
         progress_logger = ProgressLogger(
             self._logger, len(self.uids), message="Downloaded contact %d of %d."
         )
+        semaphore = self._build_semaphore()
         out = await asyncio.gather(
             *(
                 self._download_vcard_with_logging(
-                    uid=uid, path=directory, progress_logger=progress_logger
+                    uid=uid, path=directory, progress_logger=progress_logger, semaphore=semaphore
                 )
                 for uid in self.uids
             )
@@ -237,7 +269,6 @@ class NCAddressBook:
             headers=headers,
             content=vcard.serialize().encode(),
         )
-        check_response_status(response)
 
         if etag := response.headers.get("oc-etag"):
             self._uids[uid] = etag
@@ -246,9 +277,11 @@ class NCAddressBook:
         self,
         vcard: Component,
         progress_logger: ProgressLogger,
+        semaphore: Optional[asyncio.Semaphore],
         check_override: bool = True,
     ) -> None:
-        await self.upload_vcard(vcard, check_override)
+        async with _maybe_bounded(semaphore):
+            await self.upload_vcard(vcard, check_override)
         progress_logger.log()
 
     async def upload_all_vcards(
@@ -267,18 +300,21 @@ class NCAddressBook:
             List[:class:`vobject.base.Component`:] The vCards.
         """
         files = list(Path(directory).glob("*.vcf"))
+        # Reading & parsing is blocking, so we keep it off the event loop. All files are parsed
+        # before the first upload so that a malformed file doesn't leave a partial upload behind
+        vcards = await asyncio.gather(*(asyncio.to_thread(_read_vcard, file) for file in files))
         progress_logger = ProgressLogger(
             self._logger, len(files), message="Uploaded vCard %d of %d."
         )
+        semaphore = self._build_semaphore()
         await asyncio.gather(
             *(
                 self._upload_vcard_with_logging(
-                    vcard=vobject.readOne(
-                        file.read_text(encoding="utf-8"), transform=True, validate=True
-                    ),
+                    vcard=vcard,
                     check_override=check_override,
                     progress_logger=progress_logger,
+                    semaphore=semaphore,
                 )
-                for file in files
+                for vcard in vcards
             )
         )
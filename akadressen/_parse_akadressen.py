@@ -1,10 +1,11 @@
 #!/usr/bin/env python
 """Module containing functionality to parse the AkaDressen from the AkaBlas homepage."""
+import os
 from enum import Enum
 from io import BytesIO
 from logging import getLogger
+from typing import Any
 from urllib.parse import urljoin
-from uuid import uuid4
 
 import numpy as np
 import pandas as pd
@@ -12,17 +13,15 @@ import vobject
 from httpx import AsyncClient
 
 from akadressen._data_parsers import (
-    expand_brunswick,
-    parse_full_street,
-    phone_number,
-    remove_whitespaces,
-    split_city_state,
+    HOUSE_NUMBER_STREET_PATTERN,
+    LOCAL_PHONE_NUMBER_STARTS,
+    STREET_HOUSE_NUMBER_PATTERN,
+    YEAR_PATTERN,
     string_to_date,
     year_from_date,
 )
 from akadressen._util import ProgressLogger, check_response_status, string_to_instrument
 
-_NAN = type(np.nan)
 _logger = getLogger(__name__)
 
 
@@ -69,7 +68,12 @@ async def get_akadressen_vcards(
     csv = await _download_akadressen(base_url=base_url, username=username, password=password)
     file_like_csv = BytesIO(csv)
     file_like_csv.seek(0)
-    table = pd.read_csv(file_like_csv, sep=";", encoding="utf-8")
+    # Reading everything as strings skips the type inference - we parse the columns ourselves.
+    # Without NA detection, empty cells are read as empty strings, so every column supports the
+    # `.str` accessor - even one without any entries
+    table = pd.read_csv(
+        file_like_csv, sep=";", encoding="utf-8", dtype=str, na_filter=False, engine="c"
+    )
 
     # gives the columns proper names
     table = table.rename(
@@ -93,52 +97,73 @@ async def get_akadressen_vcards(
     # Extract available data from the files
     _logger.debug("Processing file.")
 
-    # replace np.Nan with None
-    table = table.replace({np.nan: None})
+    # Strip all entries and treat the ones that are empty afterwards as missing
+    table = table.apply(lambda column: column.str.strip()).replace({"": None})
 
-    table.loc[:, Const.FAMILY_NAME] = table.loc[:, Const.FAMILY_NAME].apply(remove_whitespaces)
-    table.loc[:, Const.GIVEN_NAME] = table.loc[:, Const.GIVEN_NAME].apply(remove_whitespaces)
-    table.loc[:, Const.NICKNAME] = table.loc[:, Const.NICKNAME].apply(remove_whitespaces)
-    table.loc[:, Const.DATE_OF_BIRTH] = table.loc[:, Const.DATE_OF_BIRTH].apply(string_to_date)
-    table.loc[:, Const.LANDLINE] = table.loc[:, Const.LANDLINE].apply(phone_number)
-    table.loc[:, Const.FULL_STREET] = table.loc[:, Const.FULL_STREET].apply(remove_whitespaces)
-    table.loc[:, Const.CITY_STATE] = (
-        table.loc[:, Const.CITY_STATE].apply(remove_whitespaces).apply(expand_brunswick)
+    # `na_action="ignore"` spares the scalar parsers from handling missing values themselves
+    table[Const.DATE_OF_BIRTH] = table[Const.DATE_OF_BIRTH].map(string_to_date, na_action="ignore")
+    table[Const.LANDLINE] = _phone_number(table[Const.LANDLINE])
+    table[Const.CITY_STATE] = table[Const.CITY_STATE].str.replace(
+        "BS", "Braunschweig", regex=False
     )
-    table.loc[:, Const.MOBILE] = (
-        table.loc[:, Const.MOBILE].apply(remove_whitespaces).apply(phone_number)
+    table[Const.MOBILE] = _phone_number(table[Const.MOBILE])
+    table[Const.INSTRUMENT] = table[Const.INSTRUMENT].map(string_to_instrument, na_action="ignore")
+    # Most entries are just the year, which doesn't need to be parsed as full date
+    joined = table[Const.JOINED]
+    is_year = joined.str.fullmatch(YEAR_PATTERN, na=False)
+    table[Const.JOINED] = (
+        pd.to_numeric(joined[is_year])
+        .reindex(joined.index)
+        .fillna(
+            joined[~is_year]
+            .map(string_to_date, na_action="ignore")
+            .map(year_from_date, na_action="ignore")
+        )
     )
-    table.loc[:, Const.INSTRUMENT] = (
-        table.loc[:, Const.INSTRUMENT].apply(remove_whitespaces).apply(string_to_instrument)
+
+    # split "city, state" into two columns. Splitting on the surrounding whitespace, too, spares
+    # us stripping the columns afterwards, which would fail for an empty state column.
+    # `reindex` makes sure that both columns exist even if no entry contains a comma
+    city_state_table = (
+        table[Const.CITY_STATE]
+        .str.split(r"\s*,\s*", n=1, expand=True, regex=True)
+        .reindex(columns=[0, 1])
     )
-    table.loc[:, Const.JOINED] = (
-        table.loc[:, Const.JOINED]
-        .apply(remove_whitespaces)
-        .apply(string_to_date)
-        .apply(year_from_date)
+    table[Const.CITY] = city_state_table[0]
+    table[Const.STATE] = city_state_table[1]
+
+    # Street & house number may be given in either order. If neither pattern matches, we just
+    # fall back to putting everything as the street ...
+    full_street = table[Const.FULL_STREET]
+    street_number_table = full_street.str.extract(STREET_HOUSE_NUMBER_PATTERN)
+    unmatched = street_number_table["street"].isna()
+    street_number_table = street_number_table.fillna(
+        full_street[unmatched].str.extract(HOUSE_NUMBER_STREET_PATTERN)
     )
+    table[Const.STREET] = street_number_table["street"].fillna(full_street)
+    table[Const.HOUSE_NUMBER] = street_number_table["house_number"]
+    table[Const.ADDITIONAL_ADDRESS_INFO] = street_number_table["additional"]
 
-    # replace np.Nan with None again - for some reason that's needed
+    # replace np.Nan with None again - the `.str` methods give np.Nan for missing values
     table = table.replace({np.nan: None})
 
-    city_state_table = table.loc[:, Const.CITY_STATE].apply(split_city_state).apply(pd.Series)
-    city_state_table = city_state_table.rename(columns={0: Const.CITY, 1: Const.STATE})
-    table = pd.concat([table, city_state_table], axis=1)
-
-    street_number_table = table.loc[:, Const.FULL_STREET].apply(parse_full_street).apply(pd.Series)
-    street_number_table = street_number_table.rename(
-        columns={0: Const.STREET, 1: Const.HOUSE_NUMBER, 2: Const.ADDITIONAL_ADDRESS_INFO}
-    )
-    table = pd.concat([table, street_number_table], axis=1)
-
     _logger.info("Transforming AkaDressen into vCards")
     progress_logger = ProgressLogger(_logger, len(table), message="vCard %d of %d is ready.")
-    return table.apply(_row_to_card, axis=1, progress_logger=progress_logger).to_list()
+    # Plain dicts are much cheaper to build & index than the Series that `apply(axis=1)` creates
+    return [
+        _row_to_card(row, uid=uid, progress_logger=progress_logger)
+        for row, uid in zip(table.to_dict(orient="records"), _uuid4_hexes(len(table)))
+    ]
+
+
+def _phone_number(column: pd.Series) -> pd.Series:
+    # Make an educated guess on when we're in brunswick …
+    in_brunswick = column.str[:1].isin(LOCAL_PHONE_NUMBER_STARTS)
+    return column.mask(in_brunswick, "0531/" + column[in_brunswick])
 
 
 async def _get(client: AsyncClient, base_url: str, file_name: str) -> bytes:
     response = await client.get(urljoin(base_url, f"latest_{file_name}"))
-    check_response_status(response)
     return response.content
 
 
@@ -147,11 +172,24 @@ async def _download_akadressen(base_url: str, username: str, password: str) -> b
         auth=(username, password) if username and password else None,
         verify=True,
         headers={"User-Agent": "AkaDressen-Script"},
+        event_hooks={"response": [check_response_status]},
     ) as client:
         return await _get(client, base_url, "Akadressen_CSV.csv")
 
 
-def _row_to_card(row: pd.Series, progress_logger: ProgressLogger) -> vobject.base.Component:
+def _uuid4_hexes(count: int) -> list[str]:
+    # Same as `uuid.uuid4().hex` but without building the intermediate `UUID` objects and with
+    # a single call to `os.urandom` for all of them
+    random_bytes = bytearray(os.urandom(16 * count))
+    for offset in range(0, 16 * count, 16):
+        random_bytes[offset + 6] = (random_bytes[offset + 6] & 0x0F) | 0x40  # version 4
+        random_bytes[offset + 8] = (random_bytes[offset + 8] & 0x3F) | 0x80  # RFC 4122 variant
+    return [random_bytes[offset : offset + 16].hex() for offset in range(0, 16 * count, 16)]
+
+
+def _row_to_card(
+    row: dict[str, Any], uid: str, progress_logger: ProgressLogger
+) -> vobject.base.Component:
     vcard = vobject.vCard()
 
     given = row[Const.GIVEN_NAME] or ""
@@ -173,7 +211,7 @@ def _row_to_card(row: pd.Series, progress_logger: ProgressLogger) -> vobject.bas
     elif instrument:
         vcard.add("note").value = f"Spielt {instrument} bei AkaBlas."
 
-    vcard.add("uid").value = uuid4().hex
+    vcard.add("uid").value = uid
     vcard.add("fn").value = full_name
     vcard.add("n").value = vobject.vcard.Name(
         family=family,
@@ -188,7 +226,7 @@ def _row_to_card(row: pd.Series, progress_logger: ProgressLogger) -> vobject.bas
         vcard.add("adr").value = vobject.vcard.Address(
             street=(row[Const.STREET] or "") + (f"\n{additional}" if additional else ""),
             city=row[Const.CITY] or "",
-            code=str(int(row[Const.ZIP_CODE])) if row[Const.ZIP_CODE] else "",
+            code=row[Const.ZIP_CODE] or "",
             country=row[Const.STATE] or "",
             box=row[Const.HOUSE_NUMBER] or "",
             extended=additional,
@@ -2,6 +2,7 @@
 """A module containing functionality to retrieve profile pictures from Telegram based on the
 phone number. """
 import asyncio
+from collections import defaultdict
 from collections.abc import Sequence
 from logging import getLogger
 from typing import BinaryIO, Union, cast
@@ -12,29 +13,35 @@ from pyrogram import Client
 from akadressen._util import ProgressLogger
 
 _logger = getLogger(__name__)
+# Characters that are commonly used to format phone numbers
+_PHONE_NUMBER_FORMATTING = str.maketrans("", "", "/- \t\r\n")
+# Profile pictures are small, so we can download quite a few of them at once
+_MAX_CONCURRENT_DOWNLOADS = 32
 
 
-async def _add_photo_to_vcard(
-    vcard: vobject.base.Component,
+async def _add_photo_to_vcards(
+    vcards: Sequence[vobject.base.Component],
     photo_id: str,
     client: Client,
     progress_logger: ProgressLogger,
     semaphore: asyncio.Semaphore,
 ) -> None:
     async with semaphore:
-        if vcard.contents.get("photo"):
+        if not (vcards := [vcard for vcard in vcards if not vcard.contents.get("photo")]):
             return
 
         # Apparently pyrogram has no functionality to download directly to bytes
         file_like = await client.download_media(photo_id, in_memory=True)
         file_like = cast(BinaryIO, file_like)
+        photo_bytes = file_like.read()
 
-        photo = vcard.add("photo")
-        photo.encoding_param = "B"
-        photo.type_param = "JPG"
-        photo.value = file_like.read()
+        for vcard in vcards:
+            photo = vcard.add("photo")
+            photo.encoding_param = "B"
+            photo.type_param = "JPG"
+            photo.value = photo_bytes
 
-        progress_logger.log()
+            progress_logger.log()
 
 
 async def add_telegram_profile_pictures_to_vcards(
@@ -54,19 +61,27 @@ async def add_telegram_profile_pictures_to_vcards(
             you pass the name of an already existing session, the login-process will be skipped.
 
     """
-    async with Client(session_name, api_id, api_hash) as client:
+    async with Client(
+        session_name,
+        api_id,
+        api_hash,
+        # pyrogram only downloads one file at a time by default
+        max_concurrent_transmissions=_MAX_CONCURRENT_DOWNLOADS,
+    ) as client:
         _logger.debug("Requesting all available contacts for this Telegram account.")
 
         photo_map = {}
         for contact in await client.get_contacts():
             if (phone_number := contact.phone_number) and (photo := contact.photo):
+                phone_number = phone_number.translate(_PHONE_NUMBER_FORMATTING)
                 if not phone_number.startswith("0") and not phone_number.startswith("+"):
                     phone_number = f"+{phone_number}"
 
                 photo_map[phone_number] = photo.big_file_id
 
         _logger.debug("Checking vCards against found contacts.")
-        tasks: list[tuple[vobject.base.Component, str]] = []
+        # Several contacts may share a profile picture, so we group them by the photo
+        tasks: defaultdict[str, list[vobject.base.Component]] = defaultdict(list)
         progress_logger = ProgressLogger(
             _logger, len(vcards), message="Checked %d of %d vCards.", modulo=50
         )
@@ -76,33 +91,33 @@ async def add_telegram_profile_pictures_to_vcards(
                 continue
 
             for entry in tel:
-                phone_number = entry.value.strip().replace("/", "").replace(" ", "")
+                phone_number = entry.value.translate(_PHONE_NUMBER_FORMATTING)
                 photo_id = photo_map.get(phone_number)
                 if not photo_id and phone_number.startswith("0"):
                     photo_id = photo_map.get(f"+49{phone_number[1:]}")
 
                 if photo_id:
-                    tasks.append((vcard, photo_id))
-                    continue
+                    tasks[photo_id].append(vcard)
+                    break
 
             progress_logger.log()
 
         progress_logger = ProgressLogger(
             _logger,
-            len(tasks),
-            message="Downloaded %d of %d found photos.",
+            sum(map(len, tasks.values())),
+            message="Added %d of %d found photos.",
         )
         if tasks:
-            photo_download_semaphore = asyncio.Semaphore(5)
+            photo_download_semaphore = asyncio.Semaphore(_MAX_CONCURRENT_DOWNLOADS)
             await asyncio.gather(
                 *(
-                    _add_photo_to_vcard(
-                        vcard,
+                    _add_photo_to_vcards(
+                        photo_vcards,
                         photo_id,
                         client,
                         progress_logger,
                         semaphore=photo_download_semaphore,
                     )
-                    for vcard, photo_id in tasks
+                    for photo_id, photo_vcards in tasks.items()
                 )
             )
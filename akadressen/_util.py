@@ -1,20 +1,23 @@
 #!/usr/bin/env python
 """This module contains utility functionality for internal use within the akadressen package."""
+import itertools
 import logging
 from logging import Logger
-from threading import Lock
 
 import vobject.vcard
 from httpx import HTTPError, Response
 
 
-def check_response_status(response: Response) -> None:
+async def check_response_status(response: Response) -> None:
     """Checks if the responses status code indicates success. Raises an exception otherwise.
+    Meant to be registered as ``"response"`` event hook of :class:`httpx.AsyncClient`.
 
     Args:
         response (:class:`httpx.Response`): The response.
     """
     if not 200 <= response.status_code <= 299:
+        # Event hooks are called before the body is read
+        await response.aread()
         raise HTTPError(f"{response.text}")
 
 
@@ -91,16 +94,13 @@ class ProgressLogger:  # pylint: disable=too-few-public-methods
         self._total_number = total_number
         self._level = level
         self._message = message or "%d/%d tasks done."
-        self._count = 0
+        # `next` on an `itertools.count` is atomic, so there is no need for a lock
+        self._counter = itertools.count(1)
         self._modulo = modulo
-        self.__lock = Lock()
 
     def log(self) -> None:
         """Signals that a tasks was done and makes the logger emit a corresponding log entry."""
-        with self.__lock:
-            self._count = self._count + 1
-
-            if not self._modulo or (
-                self._count % self._modulo == 0 or self._count >= self._total_number
-            ):
-                self._logger.log(self._level, self._message, self._count, self._total_number)
+        count = next(self._counter)
+        if self._modulo and count % self._modulo and count < self._total_number:
+            return
+        self._logger.log(self._level, self._message, count, self._total_number)
@@ -3,6 +3,7 @@
 the phone number."""
 import base64
 import json
+import re
 from collections.abc import Sequence
 from logging import getLogger
 from pathlib import Path
@@ -13,15 +14,15 @@ import vobject.base
 from akadressen._util import ProgressLogger
 
 _logger = getLogger(__name__)
+# The phone numbers are included in the URLs of the profile pictures
+_URL_PHONE_NUMBER_PATTERN = re.compile(r"\d{6,}")
+_NON_DIGIT_PATTERN = re.compile(r"\D")
 
 
 def _add_photo_to_vcard(
     vcard: vobject.base.Component,
     photo: bytes,
 ) -> None:
-    if vcard.contents.get("photo"):
-        return
-
     photo_component = vcard.add("photo")
     photo_component.encoding_param = "B"
     photo_component.type_param = "JPG"
@@ -51,7 +52,8 @@ def add_whatsapp_profile_pictures_to_vcards(
     if not (entries := data.get("entries")):
         raise RuntimeError("The data is not in a format that I can handle.")
 
-    photo_map: dict[str, bytes] = {}
+    # The photos are only decoded once they are actually assigned to a vCard
+    photo_map: dict[str, str] = {}
     for entry in entries:  # pylint: disable=too-many-nested-blocks
         if (request := entry.get("request")) and (response := entry.get("response")):
             if (url := request.get("url")) and (content := response.get("content")):
@@ -61,7 +63,8 @@ def add_whatsapp_profile_pictures_to_vcards(
                         encoding = content.get("encoding")
 
                         if encoding.lower() == "base64":
-                            photo_map[url] = base64.b64decode(image)
+                            for phone_number in _URL_PHONE_NUMBER_PATTERN.findall(url):
+                                photo_map[phone_number] = image
 
     _logger.debug("Checking vCards against found contacts.")
     progress_logger = ProgressLogger(
@@ -69,16 +72,17 @@ def add_whatsapp_profile_pictures_to_vcards(
     )
 
     for vcard in vcards:
-        if not (tel := vcard.contents.get("tel")):
+        if vcard.contents.get("photo") or not (tel := vcard.contents.get("tel")):
             continue
 
         for entry in tel:
-            phone_number = entry.value.strip().replace("/", "").replace(" ", "")
-            for url, photo in photo_map.items():
-                if phone_number in url or (
-                    phone_number.startswith("0") and phone_number[1:] in url
-                ):
-                    _add_photo_to_vcard(vcard, photo)
-                    continue
+            phone_number = _NON_DIGIT_PATTERN.sub("", entry.value)
+            profile_picture = photo_map.get(phone_number)
+            if not profile_picture and phone_number.startswith("0"):
+                profile_picture = photo_map.get(f"49{phone_number[1:]}")
+
+            if profile_picture:
+                _add_photo_to_vcard(vcard, base64.b64decode(profile_picture))
+                break
 
         progress_logger.log()